@@ -64,16 +64,22 @@ db.user_events.aggregate([
   { $match: { event_type: "page_view" } },
   {
     $group: {
-      _id: "$data.product_id",
-      view_count: { $sum: 1 },
-      unique_viewers: { $addToSet: "$user_id" }
+      _id: { product_id: "$data.product_id", user_id: "$user_id" },
+      views: { $sum: 1 }
+    }
+  },
+  {
+    $group: {
+      _id: "$_id.product_id",
+      view_count: { $sum: "$views" },
+      unique_viewer_count: { $sum: 1 }
     }
   },
   {
     $project: {
       product_id: "$_id",
       view_count: 1,
-      unique_viewer_count: { $size: "$unique_viewers" },
+      unique_viewer_count: 1,
       _id: 0
     }
   },
@@ -26,6 +26,7 @@ db.product_catalog.createIndex({ "variants.color": 1 });
 // behavior tracking
 db.createCollection("user_events");
 db.user_events.createIndex({ user_id: 1, timestamp: -1 });
-db.user_events.createIndex({ event_type: 1 });
+db.user_events.createIndex({ user_id: 1, event_type: 1, timestamp: -1 });
+db.user_events.createIndex({ event_type: 1, "data.product_id": 1 });
 db.user_events.createIndex({ "data.product_id": 1 });
 db.user_events.createIndex({ timestamp: 1 }, { expireAfterSeconds: 365 * 24 * 3600 });
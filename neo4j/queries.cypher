@@ -1,5 +1,20 @@
-
 // Q12
+// (edges are written by scripts/generate_data.py, one per product pair)
+
+MATCH (:Category {name: "electronics"})<-[:BELONGS_TO]-(hp:Product)
+      -[r:FREQUENTLY_BOUGHT_WITH]-(other:Product)
+RETURN other.product_id         AS product_id,
+       other.name               AS product_name,
+       SUM(r.co_purchase_count) AS co_purchase_count
+ORDER BY co_purchase_count DESC
+LIMIT 3;
+
+// ---------------------------------------------------------------
+// Alternative Q12: traversal over PURCHASED edges at query time
+// ---------------------------------------------------------------
+
+// (what the pre-computed edges replace; visits every buyer's purchases)
+
 MATCH (p:Product)-[:BELONGS_TO]->(:Category {name: "electronics"})
 WITH collect(p) AS electronics,
      [x IN collect(p) WHERE x.name CONTAINS "Headphone"] AS headphones
@@ -14,17 +29,6 @@ RETURN other.product_id AS product_id,
 ORDER BY co_purchase_count DESC
 LIMIT 3;
 
-// ---------------------------------------------------------------
-// Alternative Q12: using pre-computed FREQUENTLY_BOUGHT_WITH edges
-// ---------------------------------------------------------------
-
-MATCH (headphone:Product)-[r:FREQUENTLY_BOUGHT_WITH]->(other:Product)
-WHERE headphone.name CONTAINS "Headphone"
-RETURN other.product_id AS product_id,
-       other.name       AS product_name,
-       r.co_purchase_count
-ORDER BY r.co_purchase_count DESC
-LIMIT 3;
 
 // ---------------------------------------------------------------
 // Bonus: Graph queries that outperform relational joins
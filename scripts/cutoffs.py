@@ -0,0 +1,17 @@
+"""
+Date cutoffs shared by run_all_queries.py and performance_eval.py, so both
+scripts filter Q2 and Q11 over the same windows.
+
+The cutoffs are bound as query parameters rather than computed by NOW() on
+the server, so the statement text never changes between runs. Truncated to
+the UTC day, their values (and so the .qcache keys) change once a day.
+"""
+
+from datetime import datetime, timedelta
+
+TODAY = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+# Q11: carts created in the last 30 days
+CART_SINCE = TODAY - timedelta(days=30)
+# Q2: page views in the last six months
+VIEWS_SINCE = TODAY - timedelta(days=182)
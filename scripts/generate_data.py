@@ -2,14 +2,20 @@
 E-Commerce Platform — Synthetic Data Generator
 Generates realistic data for MySQL, MongoDB, and Neo4j.
 
-Requirements:  pip install faker mysql-connector-python pymongo neo4j
+Requirements:  pip install faker numpy mysql-connector-python pymongo neo4j
+Optional:      pip install orjson   (faster JSON output)
+               pip install numba    (compiled order totals)
 """
 
 import random
 import json
 import csv
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 
 try:
@@ -17,9 +23,25 @@ try:
 except ImportError:
     raise SystemExit("Install faker first:  pip install faker")
 
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Install numpy first:  pip install numpy")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 fake = Faker()
 Faker.seed(42)
 random.seed(42)
+rng = np.random.default_rng(42)
 
 OUTPUT_DIR = Path(__file__).parent.parent / "generated_data"
 OUTPUT_DIR.mkdir(exist_ok=True)
@@ -33,6 +55,9 @@ NUM_USER_EVENTS = 500_000
 NUM_CARTS = 40_000
 CART_ITEMS_PER_CART = (1, 6)
 ORDER_ITEMS_PER_ORDER = (1, 5)
+GEN_WORKERS = min(4, os.cpu_count() or 1)
+EVENT_BATCH = 10_000   # user events encoded per write
+CSV_CHUNK = 50_000     # table rows converted and written per writerows call
 
 CATEGORIES = [
     {"category_id": 1, "category_name": "electronics", "parent_category_id": None, "description": "Electronic gadgets and accessories"},
@@ -45,12 +70,15 @@ CATEGORIES = [
 
 DEVICE_TYPES = ["tablet", "laptop", "mobile", "desktop"]
 SHIPPING_OPTIONS = ["standard", "mid_tier", "expedited", "overnight"]
+SHIP_NAMES = np.array(SHIPPING_OPTIONS)
+SHIP_FEE_ARR = np.array([5.99, 9.99, 14.99, 24.99])  # aligned with SHIPPING_OPTIONS
 PAYMENT_METHODS = ["credit_card", "debit_card", "bank_account", "paypal"]
 ORDER_STATUSES = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
 RETURN_STATUSES = ["initiated", "label_printed", "shipped_back", "received", "refunded", "exchanged"]
 EVENT_TYPES = ["page_view", "search", "click", "add_to_cart", "remove_from_cart"]
 COLORS = ["black", "white", "blue", "red", "aqua-blue", "coral", "green", "grey", "pink", "terracotta"]
 SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+CLICK_ELEMENTS = ["product_card", "image", "add_to_cart_btn", "detail_link"]
 
 ELECTRONICS_ATTRS = {
     "battery_life": lambda: f"{random.randint(4,50)} hours",
@@ -84,129 +112,231 @@ SEARCH_TERMS = [
 ]
 
 
+def faker_pool(provider, size=2000, **kwargs):
+    """Call a Faker provider `size` times up front; rows then draw from the pool by index."""
+    return np.array([provider(**kwargs) for _ in range(size)])
+
+
+# Free-text fields shared by the product and catalog generators are drawn
+# from pools sampled once here instead of calling Faker per row.
+WORD_POOL = faker_pool(fake.word, 5000)
+SENTENCE_POOL = faker_pool(fake.sentence, nb_words=12)
+BS_POOL = np.char.capitalize([bs.split()[0] for bs in faker_pool(fake.bs)])
+
+
+if njit:
+    @njit(parallel=True, cache=True)
+    def order_totals(item_subtotals, offsets, ship_fees, tax_rate):
+        """Per-order (totals, taxes); order i owns item_subtotals[offsets[i]:offsets[i + 1]]."""
+        n = len(ship_fees)
+        totals = np.empty(n)
+        taxes = np.empty(n)
+        for i in prange(n):
+            subtotal = item_subtotals[offsets[i]:offsets[i + 1]].sum()
+            tax = round(subtotal * tax_rate, 2)
+            taxes[i] = tax
+            totals[i] = round(subtotal + tax + ship_fees[i], 2)
+        return totals, taxes
+else:
+    def order_totals(item_subtotals, offsets, ship_fees, tax_rate):
+        """Per-order (totals, taxes); order i owns item_subtotals[offsets[i]:offsets[i + 1]]."""
+        subtotals = np.add.reduceat(item_subtotals, offsets[:-1])
+        taxes = np.round(subtotals * tax_rate, 2)
+        return np.round(subtotals + taxes + ship_fees, 2), taxes
+
+
+def run_seeded(seed, fn, *args):
+    """Run a generator with fresh seeds, so its output doesn't depend on which process runs it."""
+    global rng
+    random.seed(seed)
+    Faker.seed(seed)
+    rng = np.random.default_rng(seed)
+    return fn(*args)
+
+
 def fmt_dt(dt):
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
-def write_csv(filename, rows, fieldnames):
-    path = OUTPUT_DIR / filename
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"  wrote {len(rows):>9,} rows → {path.name}")
+def pick(pool, n):
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def random_datetimes(n, start_days_ago, end_days_ago=0, utc=False):
+    """n uniform timestamps (second resolution) between two day offsets from now (local, or UTC with utc=True)."""
+    now = np.datetime64(datetime.utcnow() if utc else datetime.now(), "s")
+    offsets = rng.integers(end_days_ago * 86400, start_days_ago * 86400, n)
+    return now - offsets.astype("timedelta64[s]")
+
+
+def fmt_dt_array(arr):
+    return np.char.replace(np.datetime_as_string(arr, unit="s"), "T", " ")
+
+
+def num_rows(columns):
+    return len(next(iter(columns.values())))
+
+
+def open_csv(filename, header):
+    """Open a CSV in OUTPUT_DIR with a 1 MiB write buffer and write its header; returns (file, writer)."""
+    f = open(OUTPUT_DIR / filename, "w", newline="", encoding="utf-8", buffering=1 << 20)
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(header)
+    return f, writer
+
+
+def report_written(filename, count, unit="rows"):
+    print(f"  wrote {count:>9,} {unit} → {filename}")
+
+
+def write_csv(filename, columns):
+    """Write a column table (name -> array or list) with a header row, CSV_CHUNK rows at a time.
+
+    datetime64 columns are formatted here, so tables keep them as datetimes;
+    only one chunk of rows exists as Python objects at any time.
+    """
+    n = num_rows(columns)
+    f, writer = open_csv(filename, columns)
+    with f:
+        for lo in range(0, n, CSV_CHUNK):
+            chunk = [c[lo:lo + CSV_CHUNK] for c in columns.values()]
+            values = [
+                (fmt_dt_array(c) if c.dtype.kind == "M" else c).tolist() if isinstance(c, np.ndarray) else c
+                for c in chunk
+            ]
+            writer.writerows(zip(*values))
+    report_written(filename, n)
+
+
+def write_records(filename, records):
+    """Write a list of row dicts; the header comes from the first row's keys."""
+    fieldnames = list(records[0])
+    f, writer = open_csv(filename, fieldnames)
+    with f:
+        writer.writerows(map(itemgetter(*fieldnames), records))
+    report_written(filename, len(records))
 
 
 def write_json(filename, data):
     path = OUTPUT_DIR / filename
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, default=str, indent=None)
-    print(f"  wrote {len(data):>9,} docs → {path.name}")
+    if orjson:
+        path.write_bytes(orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str, indent=None)
+    report_written(path.name, len(data), "docs")
+
+
+def json_lines(docs):
+    """Encode docs as newline-delimited JSON bytes."""
+    if orjson:
+        return b"".join(orjson.dumps(d) + b"\n" for d in docs)
+    return "".join(json.dumps(d) + "\n" for d in docs).encode()
 
 
 # ======================== GENERATE ========================
 
 def gen_users():
-    users = []
-    users.append({
+    n = NUM_USERS - 1
+    uids = np.arange(2, NUM_USERS + 1)
+    suffixes = uids.astype(str)
+    created = random_datetimes(n, 730, 30)
+    updated = created + rng.integers(0, 181, n).astype("timedelta64[D]")
+    generated = {
+        "user_id": uids,
+        "username": np.char.add(np.char.add(pick(faker_pool(fake.user_name), n), "_"), suffixes),
+        "email": np.char.add(np.char.add(np.char.add("user", suffixes), "@"), pick(faker_pool(fake.free_email_domain), n)),
+        "password_hash": pick(faker_pool(fake.sha256), n),
+        "first_name": pick(faker_pool(fake.first_name), n),
+        "last_name": pick(faker_pool(fake.last_name), n),
+        "phone": pick(faker_pool(fake.phone_number), n),
+        "created_at": fmt_dt_array(created),
+        "updated_at": fmt_dt_array(updated),
+    }
+    sarah = {
         "user_id": 1, "username": "sarah", "email": "sarah@example.com",
         "password_hash": fake.sha256(), "first_name": "Sarah", "last_name": "Johnson",
         "phone": fake.phone_number(),
         "created_at": "2025-06-15 10:00:00", "updated_at": "2026-02-20 14:00:00"
-    })
-    for i in range(2, NUM_USERS + 1):
-        created = fake.date_time_between(start_date="-2y", end_date="-30d")
-        users.append({
-            "user_id": i,
-            "username": f"{fake.user_name()}_{i}",
-            "email": f"user{i}@{fake.free_email_domain()}",
-            "password_hash": fake.sha256(),
-            "first_name": fake.first_name(),
-            "last_name": fake.last_name(),
-            "phone": fake.phone_number(),
-            "created_at": str(created),
-            "updated_at": str(created + timedelta(days=random.randint(0, 180))),
-        })
-    return users
+    }
+    return {k: np.concatenate(([sarah[k]], col)) for k, col in generated.items()}
 
 
 def gen_addresses(users):
-    addresses = []
-    aid = 1
-    for u in users:
-        for addr_type in ["shipping", "billing"]:
-            addresses.append({
-                "address_id": aid,
-                "user_id": u["user_id"],
-                "address_type": addr_type,
-                "street": fake.street_address(),
-                "city": fake.city(),
-                "state": fake.state_abbr(),
-                "zip_code": fake.zipcode(),
-                "country": "US",
-                "is_default": addr_type == "shipping",
-            })
-            aid += 1
-    return addresses
+    user_ids = np.repeat(users["user_id"], 2)
+    n = len(user_ids)
+    addr_types = np.tile(["shipping", "billing"], len(users["user_id"]))
+    return {
+        "address_id": np.arange(1, n + 1),
+        "user_id": user_ids,
+        "address_type": addr_types,
+        "street": pick(faker_pool(fake.street_address), n),
+        "city": pick(faker_pool(fake.city), n),
+        "state": pick(faker_pool(fake.state_abbr), n),
+        "zip_code": pick(faker_pool(fake.zipcode), n),
+        "country": np.full(n, "US"),
+        "is_default": addr_types == "shipping",
+    }
 
 
 def gen_products():
-    products = []
-    for i in range(1, NUM_PRODUCTS + 1):
-        cat_id = random.choice([c["category_id"] for c in CATEGORIES])
-        products.append({
-            "product_id": i,
-            "category_id": cat_id,
-            "product_name": f"{fake.word().capitalize()} {fake.word().capitalize()} {fake.bs().split()[0].capitalize()}",
-            "description": fake.sentence(nb_words=12),
-            "base_price": round(random.uniform(5.99, 499.99), 2),
-            "stock_quantity": random.choices(
-                population=[random.randint(0, 4), random.randint(5, 200)],
-                weights=[0.1, 0.9]
-            )[0],
-            "created_at": str(fake.date_time_between(start_date="-1y", end_date="-7d")),
-            "updated_at": str(fake.date_time_between(start_date="-7d", end_date="now")),
-        })
-    return products
+    n = NUM_PRODUCTS
+    words = np.char.capitalize(WORD_POOL)
+    names = np.char.add(np.char.add(pick(words, n), " "), pick(words, n))
+    names = np.char.add(np.char.add(names, " "), pick(BS_POOL, n))
+    return {
+        "product_id": np.arange(1, n + 1),
+        "category_id": rng.choice([c["category_id"] for c in CATEGORIES], n),
+        "product_name": names,
+        "description": pick(SENTENCE_POOL, n),
+        "base_price": np.round(rng.uniform(5.99, 499.99, n), 2),
+        "stock_quantity": np.where(rng.random(n) < 0.1, rng.integers(0, 5, n), rng.integers(5, 201, n)),
+        "created_at": fmt_dt_array(random_datetimes(n, 365, 7)),
+        "updated_at": fmt_dt_array(random_datetimes(n, 7)),
+    }
 
 
 def gen_product_catalog(products):
     """MongoDB product_catalog documents with flexible attributes."""
     cat_map = {c["category_id"]: c["category_name"] for c in CATEGORIES}
     catalog = []
-    for p in products:
-        cat_name = cat_map[p["category_id"]]
+    # at most 3 single-colour variants per product
+    color_picks = iter(random.choices(COLORS, k=3 * num_rows(products)))
+    words = WORD_POOL.tolist()
+    for pid, cat_id in zip(products["product_id"].tolist(), products["category_id"].tolist()):
+        cat_name = cat_map[cat_id]
         if cat_name == "electronics":
             attrs = {k: v() for k, v in ELECTRONICS_ATTRS.items()}
-            variants = [{"color": random.choice(COLORS), "sku": f"EL-{p['product_id']}-{j}"} for j in range(random.randint(1, 3))]
+            variants = [{"color": next(color_picks), "sku": f"EL-{pid}-{j}"} for j in range(random.randint(1, 3))]
         elif cat_name == "fashion":
             attrs = {k: v() for k, v in FASHION_ATTRS.items()}
             variants = []
             for size in random.sample(SIZES, random.randint(2, 5)):
                 for color in random.sample(COLORS, random.randint(1, 3)):
-                    variants.append({"size": size, "color": color, "sku": f"FA-{p['product_id']}-{size}-{color[:3]}"})
+                    variants.append({"size": size, "color": color, "sku": f"FA-{pid}-{size}-{color[:3]}"})
         elif cat_name == "home_decor":
             attrs = {k: v() for k, v in HOME_DECOR_ATTRS.items()}
-            variants = [{"color": random.choice(COLORS), "sku": f"HD-{p['product_id']}-{j}"} for j in range(random.randint(1, 3))]
+            variants = [{"color": next(color_picks), "sku": f"HD-{pid}-{j}"} for j in range(random.randint(1, 3))]
         else:
             attrs = {k: v() for k, v in GENERIC_ATTRS.items()}
-            variants = [{"sku": f"GN-{p['product_id']}-{j}"} for j in range(random.randint(1, 2))]
+            variants = [{"sku": f"GN-{pid}-{j}"} for j in range(random.randint(1, 2))]
 
         catalog.append({
-            "product_id": p["product_id"],
+            "product_id": pid,
             "category": cat_name,
             "attributes": attrs,
             "variants": variants,
-            "tags": [fake.word() for _ in range(random.randint(1, 4))],
+            "tags": random.choices(words, k=random.randint(1, 4)),
         })
     return catalog
 
 
 def gen_sessions(users):
     sessions = []
-    session_refs = {u["user_id"]: [] for u in users}
+    user_ids = users["user_id"].tolist()
+    session_refs = {uid: [] for uid in user_ids}
 
-    for user in users:
+    for user_id in user_ids:
         num_sessions = random.choices([1, 2, 3, 4], weights=[0.25, 0.45, 0.25, 0.05])[0]
         first_login = fake.date_time_between(start_date="-90d", end_date="-3d")
         previous_session_id = ""
@@ -221,7 +351,7 @@ def gen_sessions(users):
             is_active = i == num_sessions - 1 and random.random() < 0.75
             status = "active" if is_active else random.choice(["expired", "revoked"])
             ended_at = "" if is_active else fmt_dt(last_active_at + timedelta(minutes=random.randint(1, 90)))
-            session_id = f"sess_{fake.uuid4().replace('-', '')[:24]}"
+            session_id = f"sess_{random.getrandbits(96):024x}"
 
             restored_from = ""
             if previous_session_id and random.random() < 0.65:
@@ -229,7 +359,7 @@ def gen_sessions(users):
 
             sessions.append({
                 "session_id": session_id,
-                "user_id": user["user_id"],
+                "user_id": user_id,
                 "device_type": device_type,
                 "status": status,
                 "restored_from_session_id": restored_from,
@@ -239,7 +369,7 @@ def gen_sessions(users):
                 "ended_at": ended_at,
             })
 
-            session_refs[user["user_id"]].append({
+            session_refs[user_id].append({
                 "session_id": session_id,
                 "device_type": device_type,
             })
@@ -251,16 +381,21 @@ def gen_sessions(users):
 
 def gen_carts(users, products, session_refs):
     carts, cart_items = [], []
+    cart_users = random.choices(users["user_id"].tolist(), k=NUM_CARTS)
+    item_counts = random.choices(range(CART_ITEMS_PER_CART[0], CART_ITEMS_PER_CART[1] + 1), k=NUM_CARTS)
+    total_items = sum(item_counts)
+    item_products = random.choices(products["product_id"].tolist(), k=total_items)
+    item_qtys = random.choices(range(1, 4), k=total_items)
+
     ci_id = 1
-    for cart_id in range(1, NUM_CARTS + 1):
-        user = random.choice(users)
-        user_sessions = session_refs[user["user_id"]]
+    for cart_id, user_id, n_items in zip(range(1, NUM_CARTS + 1), cart_users, item_counts):
+        user_sessions = session_refs[user_id]
         selected_session = random.choice(user_sessions)
         created = fake.date_time_between(start_date="-60d", end_date="now")
         converted = random.random() < 0.55
         carts.append({
             "cart_id": cart_id,
-            "user_id": user["user_id"],
+            "user_id": user_id,
             "session_id": selected_session["session_id"],
             "device_type": selected_session["device_type"],
             "created_at": fmt_dt(created),
@@ -269,13 +404,12 @@ def gen_carts(users, products, session_refs):
             "converted_to_order": converted,
             "converted_at": fmt_dt(created + timedelta(minutes=random.randint(5, 180))) if converted else "",
         })
-        for _ in range(random.randint(*CART_ITEMS_PER_CART)):
-            prod = random.choice(products)
+        for _ in range(n_items):
             cart_items.append({
                 "cart_item_id": ci_id,
                 "cart_id": cart_id,
-                "product_id": prod["product_id"],
-                "quantity": random.randint(1, 3),
+                "product_id": item_products[ci_id - 1],
+                "quantity": item_qtys[ci_id - 1],
                 "added_at": fmt_dt(created + timedelta(minutes=random.randint(0, 30))),
             })
             ci_id += 1
@@ -283,110 +417,106 @@ def gen_carts(users, products, session_refs):
 
 
 def gen_orders(users, products, addresses):
-    orders, order_items, payments = [], [], []
-    oi_id, pay_id = 1, 1
-    user_addr = {}
-    for a in addresses:
-        if a["address_type"] == "shipping":
-            user_addr[a["user_id"]] = a["address_id"]
-
-    for order_id in range(1, NUM_ORDERS + 1):
-        user = random.choice(users)
-        order_date = fake.date_time_between(start_date="-1y", end_date="now")
-        status = random.choices(ORDER_STATUSES, weights=[5, 10, 15, 60, 10])[0]
-        ship_opt = random.choice(SHIPPING_OPTIONS)
-        ship_fee = {"standard": 5.99, "mid_tier": 9.99, "expedited": 14.99, "overnight": 24.99}[ship_opt]
-
-        items_in_order = []
-        for _ in range(random.randint(*ORDER_ITEMS_PER_ORDER)):
-            prod = random.choice(products)
-            qty = random.randint(1, 3)
-            unit_price = prod["base_price"]
-            items_in_order.append({
-                "order_item_id": oi_id,
-                "order_id": order_id,
-                "product_id": prod["product_id"],
-                "product_name": prod["product_name"],
-                "unit_price": unit_price,
-                "quantity": qty,
-                "subtotal": round(unit_price * qty, 2),
-            })
-            oi_id += 1
-
-        subtotal = sum(i["subtotal"] for i in items_in_order)
-        tax = round(subtotal * 0.08, 2)
-        total = round(subtotal + tax + ship_fee, 2)
-
-        addr_id = user_addr.get(user["user_id"], 1)
-        orders.append({
-            "order_id": order_id,
-            "user_id": user["user_id"],
-            "order_date": str(order_date),
-            "status": status,
-            "total_amount": total,
-            "tax_amount": tax,
-            "shipping_fee": ship_fee,
-            "shipping_option": ship_opt,
-            "shipping_address_id": addr_id,
-            "expected_shipping_date": str((order_date + timedelta(days=random.randint(1, 3))).date()),
-            "expected_delivery_date": str((order_date + timedelta(days=random.randint(3, 10))).date()),
-        })
-        order_items.extend(items_in_order)
-
-        pm = random.choice(PAYMENT_METHODS)
-        payments.append({
-            "payment_id": pay_id,
-            "order_id": order_id,
-            "payment_method": pm,
-            "payment_status": "approved" if status != "cancelled" else "declined",
-            "amount": total,
-            "transaction_date": str(order_date),
-            "card_last_four": str(random.randint(1000, 9999)) if "card" in pm else "",
-            "billing_address_id": addr_id,
-        })
-        pay_id += 1
-
+    """Orders, order items and payments as column tables.
+
+    Items are stored contiguously by order, so the items of order i are the
+    slice offsets[i]:offsets[i + 1] and per-order sums need no Python loop.
+    """
+    n = NUM_ORDERS
+    is_shipping = addresses["address_type"] == "shipping"
+    addr_by_user = np.ones(users["user_id"].max() + 1, dtype=np.int64)
+    addr_by_user[addresses["user_id"][is_shipping]] = addresses["address_id"][is_shipping]
+
+    order_ids = np.arange(1, n + 1)
+    order_users = pick(users["user_id"], n)
+    statuses = rng.choice(ORDER_STATUSES, n, p=np.array([5, 10, 15, 60, 10]) / 100)
+    ship_idx = rng.integers(0, len(SHIPPING_OPTIONS), n)
+    ship_opts = SHIP_NAMES[ship_idx]
+    ship_fees = SHIP_FEE_ARR[ship_idx]
+    pay_methods = rng.choice(PAYMENT_METHODS, n)
+    order_dates = random_datetimes(n, 365)
+    order_days = order_dates.astype("datetime64[D]")
+    addr_ids = addr_by_user[order_users]
+
+    item_counts = rng.integers(ORDER_ITEMS_PER_ORDER[0], ORDER_ITEMS_PER_ORDER[1] + 1, n)
+    offsets = np.concatenate(([0], np.cumsum(item_counts)))
+    total_items = int(offsets[-1])
+    prod_idx = rng.integers(0, num_rows(products), total_items)
+    qtys = rng.integers(1, 4, total_items)
+    unit_prices = products["base_price"][prod_idx]
+    item_subtotals = np.round(unit_prices * qtys, 2)
+
+    totals, taxes = order_totals(item_subtotals, offsets, ship_fees, 0.08)
+
+    orders = {
+        "order_id": order_ids,
+        "user_id": order_users,
+        "order_date": order_dates,
+        "status": statuses,
+        "total_amount": totals,
+        "tax_amount": taxes,
+        "shipping_fee": ship_fees,
+        "shipping_option": ship_opts,
+        "shipping_address_id": addr_ids,
+        "expected_shipping_date": np.datetime_as_string(order_days + rng.integers(1, 4, n)),
+        "expected_delivery_date": np.datetime_as_string(order_days + rng.integers(3, 11, n)),
+    }
+    order_items = {
+        "order_item_id": np.arange(1, total_items + 1),
+        "order_id": np.repeat(order_ids, item_counts),
+        "product_id": products["product_id"][prod_idx],
+        "product_name": products["product_name"][prod_idx],
+        "unit_price": unit_prices,
+        "quantity": qtys,
+        "subtotal": item_subtotals,
+    }
+    is_card = np.char.find(pay_methods, "card") >= 0
+    payments = {
+        "payment_id": order_ids,
+        "order_id": order_ids,
+        "payment_method": pay_methods,
+        "payment_status": np.where(statuses != "cancelled", "approved", "declined"),
+        "amount": totals,
+        "transaction_date": order_dates,
+        "card_last_four": np.where(is_card, rng.integers(1000, 10000, n).astype(str), ""),
+        "billing_address_id": addr_ids,
+    }
     return orders, order_items, payments
 
 
-def gen_returns(orders, order_items_all):
+def gen_returns(orders, order_items):
     returns_list, return_items = [], []
     ri_id = 1
-    delivered = [o for o in orders if o["status"] == "delivered"]
-    sample_size = min(int(len(delivered) * 0.08), len(delivered))
-    returned_orders = random.sample(delivered, sample_size)
-
-    oi_by_order = {}
-    for oi in order_items_all:
-        oi_by_order.setdefault(oi["order_id"], []).append(oi)
-
-    for ret_id, order in enumerate(returned_orders, 1):
-        oi_for_order = oi_by_order.get(order["order_id"], [])
-        if not oi_for_order:
-            continue
-        try:
-            od = datetime.strptime(order["order_date"], "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            od = datetime.strptime(order["order_date"][:19], "%Y-%m-%d %H:%M:%S")
-        ret_date = od + timedelta(days=random.randint(1, 14))
+    delivered = np.flatnonzero(orders["status"] == "delivered")
+    returned = rng.choice(delivered, int(len(delivered) * 0.08), replace=False)
+    ret_dates = orders["order_date"][returned]
+    ret_dates = ret_dates + rng.integers(1, 15, len(returned)).astype("timedelta64[D]")
+    # order items are sorted by order_id, so each order's items are one slice
+    returned_ids = orders["order_id"][returned]
+    item_starts = np.searchsorted(order_items["order_id"], returned_ids).tolist()
+    item_ends = np.searchsorted(order_items["order_id"], returned_ids, side="right").tolist()
+
+    for ret_id, (idx, ret_date, lo, hi) in enumerate(
+        zip(returned.tolist(), fmt_dt_array(ret_dates).tolist(), item_starts, item_ends), 1
+    ):
         returns_list.append({
             "return_id": ret_id,
-            "order_id": order["order_id"],
-            "user_id": order["user_id"],
-            "return_date": str(ret_date),
+            "order_id": int(orders["order_id"][idx]),
+            "user_id": int(orders["user_id"][idx]),
+            "return_date": ret_date,
             "status": random.choice(RETURN_STATUSES),
             "reason": random.choice(["Wrong size", "Defective item", "Changed mind", "Item not as described", "Better price found"]),
         })
-        items_to_return = random.sample(oi_for_order, random.randint(1, min(2, len(oi_for_order))))
-        for oi in items_to_return:
-            restocking = round(oi["subtotal"] * random.choice([0, 0, 0.1, 0.15]), 2)
+        for i in random.sample(range(lo, hi), random.randint(1, min(2, hi - lo))):
+            subtotal = float(order_items["subtotal"][i])
+            restocking = round(subtotal * random.choice([0, 0, 0.1, 0.15]), 2)
             return_items.append({
                 "return_item_id": ri_id,
                 "return_id": ret_id,
-                "order_item_id": oi["order_item_id"],
-                "product_id": oi["product_id"],
-                "quantity": oi["quantity"],
-                "refund_amount": round(oi["subtotal"] - restocking, 2),
+                "order_item_id": int(order_items["order_item_id"][i]),
+                "product_id": int(order_items["product_id"][i]),
+                "quantity": int(order_items["quantity"][i]),
+                "refund_amount": round(subtotal - restocking, 2),
                 "restocking_fee": restocking,
                 "refund_status": random.choice(["pending", "processed", "completed"]),
             })
@@ -394,78 +524,162 @@ def gen_returns(orders, order_items_all):
     return returns_list, return_items
 
 
-def gen_user_events(users, products, session_refs):
-    events = []
-    for _ in range(NUM_USER_EVENTS):
-        user = random.choice(users)
-        selected_session = random.choice(session_refs[user["user_id"]])
-        event_type = random.choices(EVENT_TYPES, weights=[50, 15, 20, 10, 5])[0]
-        ts = fake.date_time_between(start_date="-6m", end_date="now")
-        prod = random.choice(products)
+def build_event_batch(cols, lookups, lo, hi):
+    """Assemble event documents for rows lo:hi of the pre-drawn event columns.
+
+    Columns named in `lookups` hold indices into that string array, and
+    datetime64 columns are formatted here, so strings exist only per batch.
+    """
+    values = []
+    for name, col in cols.items():
+        col = col[lo:hi]
+        if name in lookups:
+            col = lookups[name][col]
+        elif col.dtype.kind == "M":
+            col = np.char.add(np.datetime_as_string(col, unit="s"), "Z")
+        values.append(col.tolist())
 
-        data = {"product_id": prod["product_id"], "category": CATEGORIES[prod["category_id"] - 1]["category_name"]}
+    batch = []
+    for user_id, event_type, ts, session_id, device, product_id, category, spent, term, n_results, element in zip(
+        *values
+    ):
+        data = {"product_id": product_id, "category": category}
 
         if event_type == "page_view":
-            data["time_spent_seconds"] = random.randint(3, 300)
-            data["page_url"] = f"/products/{data['category']}/{prod['product_id']}"
+            data["time_spent_seconds"] = spent
+            data["page_url"] = f"/products/{category}/{product_id}"
         elif event_type == "search":
-            data["search_term"] = random.choice(SEARCH_TERMS)
-            data["results_count"] = random.randint(0, 100)
+            data["search_term"] = term
+            data["results_count"] = n_results
         elif event_type == "click":
-            data["element"] = random.choice(["product_card", "image", "add_to_cart_btn", "detail_link"])
+            data["element"] = element
 
-        events.append({
-            "user_id": user["user_id"],
+        batch.append({
+            "user_id": user_id,
             "event_type": event_type,
-            "timestamp": ts.isoformat(),
-            "session_id": selected_session["session_id"],
-            "device_type": selected_session["device_type"],
+            # Extended JSON, so mongoimport stores a BSON Date rather than a string
+            "timestamp": {"$date": ts},
+            "session_id": session_id,
+            "device_type": device,
             "data": data,
         })
-    return events
-
-
-def gen_neo4j_import(users, products, orders, order_items_all):
-    """Generate Cypher statements for bulk Neo4j import."""
-    lines = ["// Auto-generated Neo4j import\n"]
+    return batch
+
+
+def gen_user_events(users, products, session_refs, path):
+    """Write user events to `path` as NDJSON, EVENT_BATCH documents at a time; returns the count.
+
+    Every random field is drawn up front as a numeric column (branch-only
+    fields for all rows); string fields are indices into small lookup
+    arrays, so only one batch of strings and documents exists at any time.
+    """
+    n = NUM_USER_EVENTS
+    user_ids = users["user_id"].tolist()
+    # each user's sessions are a contiguous run of the flattened session arrays
+    sess_counts = np.array([len(session_refs[uid]) for uid in user_ids])
+    sess_starts = np.concatenate(([0], np.cumsum(sess_counts)[:-1]))
+    sess_ids = np.array([ref["session_id"] for uid in user_ids for ref in session_refs[uid]])
+    sess_devices = np.array([ref["device_type"] for uid in user_ids for ref in session_refs[uid]])
+
+    cat_names = np.array([c["category_name"] for c in CATEGORIES])
+    lookups = {
+        "event_type": np.array(EVENT_TYPES),
+        "session_id": sess_ids,
+        "device_type": sess_devices,
+        "category": cat_names,
+        "search_term": np.array(SEARCH_TERMS),
+        "element": np.array(CLICK_ELEMENTS),
+    }
+
+    user_rows = rng.integers(0, len(user_ids), n)
+    sess_picks = sess_starts[user_rows] + (rng.random(n) * sess_counts[user_rows]).astype(np.int64)
+    prod_picks = rng.integers(0, num_rows(products), n)
+    cols = {
+        "user_id": users["user_id"][user_rows],
+        "event_type": rng.choice(len(EVENT_TYPES), n, p=np.array([50, 15, 20, 10, 5]) / 100),
+        # written with a Z suffix, so drawn back from UTC now (as cutoffs.VIEWS_SINCE is)
+        "timestamp": random_datetimes(n, 180, utc=True),
+        "session_id": sess_picks,
+        "device_type": sess_picks,
+        "product_id": products["product_id"][prod_picks],
+        "category": products["category_id"][prod_picks] - 1,
+        "time_spent_seconds": rng.integers(3, 301, n),
+        "search_term": rng.integers(0, len(SEARCH_TERMS), n),
+        "results_count": rng.integers(0, 101, n),
+        "element": rng.integers(0, len(CLICK_ELEMENTS), n),
+    }
+
+    with open(path, "wb", buffering=1 << 20) as f:
+        for lo in range(0, n, EVENT_BATCH):
+            f.write(json_lines(build_event_batch(cols, lookups, lo, lo + EVENT_BATCH)))
+    return n
+
+
+def gen_neo4j_import(users, products, orders, order_items, path):
+    """Write Cypher statements for bulk Neo4j import straight to `path`."""
     cat_map = {c["category_id"]: c["category_name"] for c in CATEGORIES}
 
-    for c in CATEGORIES:
-        lines.append(f'MERGE (:Category {{name: "{c["category_name"]}"}});')
-    lines.append("")
-
-    for u in users[:200]:
-        lines.append(f'MERGE (:User {{user_id: {u["user_id"]}, name: "{u["first_name"]}"}});')
-    lines.append("")
-
-    for p in products[:1000]:
-        name_escaped = p["product_name"].replace('"', '\\"')
-        lines.append(f'MERGE (:Product {{product_id: {p["product_id"]}, name: "{name_escaped}", price: {p["base_price"]}}});')
-    lines.append("")
-
-    for p in products[:1000]:
-        cat_name = cat_map[p["category_id"]]
-        lines.append(
-            f'MATCH (p:Product {{product_id: {p["product_id"]}}}), (c:Category {{name: "{cat_name}"}}) '
-            f'MERGE (p)-[:BELONGS_TO]->(c);'
-        )
-    lines.append("")
-
-    order_user = {o["order_id"]: o["user_id"] for o in orders}
-    purchase_pairs = {}
-    for oi in order_items_all:
-        uid = order_user.get(oi["order_id"])
-        if uid is not None and uid <= 200 and oi["product_id"] <= 1000:
-            pid = oi["product_id"]
-            purchase_pairs[(uid, pid)] = purchase_pairs.get((uid, pid), 0) + 1
-
-    for (uid, pid), cnt in list(purchase_pairs.items())[:5000]:
-        lines.append(
-            f'MATCH (u:User {{user_id: {uid}}}), (p:Product {{product_id: {pid}}}) '
-            f'MERGE (u)-[:PURCHASED {{count: {cnt}}}]->(p);'
-        )
-
-    return "\n".join(lines)
+    with open(path, "wb", buffering=1 << 20) as f:
+        f.write(b"// Auto-generated Neo4j import\n\n")
+
+        for c in CATEGORIES:
+            f.write(f'MERGE (:Category {{name: "{c["category_name"]}"}});\n'.encode())
+        f.write(b"\n")
+
+        for uid, first_name in zip(users["user_id"][:200].tolist(), users["first_name"][:200].tolist()):
+            f.write(f'MERGE (:User {{user_id: {uid}, name: "{first_name}"}});\n'.encode())
+        f.write(b"\n")
+
+        graph_products = list(zip(
+            products["product_id"][:1000].tolist(),
+            products["product_name"][:1000].tolist(),
+            products["base_price"][:1000].tolist(),
+            products["category_id"][:1000].tolist(),
+        ))
+        for pid, name, price, _ in graph_products:
+            name_escaped = name.replace('"', '\\"')
+            f.write(f'MERGE (:Product {{product_id: {pid}, name: "{name_escaped}", price: {price}}});\n'.encode())
+        f.write(b"\n")
+
+        for pid, _, _, cat_id in graph_products:
+            f.write(
+                f'MATCH (p:Product {{product_id: {pid}}}), (c:Category {{name: "{cat_map[cat_id]}"}}) '
+                f'MERGE (p)-[:BELONGS_TO]->(c);\n'.encode()
+            )
+        f.write(b"\n")
+
+        # order_id is the 1-based row number of the orders table
+        item_users = orders["user_id"][order_items["order_id"] - 1]
+        item_products = order_items["product_id"]
+        in_graph = (item_users <= 200) & (item_products <= 1000)
+        purchase_pairs = Counter(zip(item_users[in_graph].tolist(), item_products[in_graph].tolist()))
+
+        for (uid, pid), cnt in islice(purchase_pairs.items(), 5000):
+            f.write(
+                f'MATCH (u:User {{user_id: {uid}}}), (p:Product {{product_id: {pid}}}) '
+                f'MERGE (u)-[:PURCHASED {{count: {cnt}}}]->(p);\n'.encode()
+            )
+        f.write(b"\n")
+
+        # Pre-computed co-purchase edges: every pair of graph products sharing
+        # an order.  Items are contiguous per order, so same-order pairs are
+        # the items k positions apart that still have the same order_id.
+        graph_items = item_products <= 1000
+        oids = order_items["order_id"][graph_items]
+        pids = item_products[graph_items]
+        co_purchases = Counter()
+        for k in range(1, ORDER_ITEMS_PER_ORDER[1]):
+            same = (oids[:-k] == oids[k:]) & (pids[:-k] != pids[k:])
+            a, b = pids[:-k][same], pids[k:][same]
+            co_purchases.update(zip(np.minimum(a, b).tolist(), np.maximum(a, b).tolist()))
+
+        # every pair is written: Q12 sums counts over a product's edges, so a
+        # top-N cut would drop most pairs and make its ranking arbitrary
+        for (a, b), cnt in co_purchases.most_common():
+            f.write(
+                f'MATCH (a:Product {{product_id: {a}}}), (b:Product {{product_id: {b}}}) '
+                f'MERGE (a)-[:FREQUENTLY_BOUGHT_WITH {{co_purchase_count: {cnt}}}]->(b);\n'.encode()
+            )
 
 
 # ======================== MAIN ========================
@@ -473,67 +687,76 @@ def gen_neo4j_import(users, products, orders, order_items_all):
 def main():
     print("Generating synthetic e-commerce data...\n")
 
-    print("[1/8] Users")
+    print("[1/9] Users")
     users = gen_users()
-    write_csv("users.csv", users, users[0].keys())
+    write_csv("users.csv", users)
 
-    print("[2/8] Addresses")
+    print("[2/9] Addresses")
     addresses = gen_addresses(users)
-    write_csv("addresses.csv", addresses, addresses[0].keys())
+    write_csv("addresses.csv", addresses)
 
-    print("[3/8] Products (SQL)")
+    print("[3/9] Products (SQL)")
     products = gen_products()
-    write_csv("products.csv", products, products[0].keys())
-    write_csv("categories.csv", CATEGORIES, CATEGORIES[0].keys())
-
-    print("[4/8] Product Catalog (MongoDB)")
-    catalog = gen_product_catalog(products)
-    write_json("product_catalog.json", catalog)
-
-    print("[5/9] Sessions (cross-device login)")
-    sessions, session_refs = gen_sessions(users)
-    write_csv("sessions.csv", sessions, sessions[0].keys())
-
-    print("[6/9] Carts")
-    carts, cart_items = gen_carts(users, products, session_refs)
-    write_csv("carts.csv", carts, carts[0].keys())
-    write_csv("cart_items.csv", cart_items, cart_items[0].keys())
-
-    print("[7/9] Orders, Order Items, Payments")
-    orders, order_items_all, payments = gen_orders(users, products, addresses)
-    write_csv("orders.csv", orders, orders[0].keys())
-    write_csv("order_items.csv", order_items_all, order_items_all[0].keys())
-    write_csv("payments.csv", payments, payments[0].keys())
-
-    print("[8/9] Returns")
-    returns_list, return_items = gen_returns(orders, order_items_all)
-    if returns_list:
-        write_csv("returns.csv", returns_list, returns_list[0].keys())
-    if return_items:
-        write_csv("return_items.csv", return_items, return_items[0].keys())
-
-    print("[9/9] User Events (MongoDB)")
-    events = gen_user_events(users, products, session_refs)
-    write_json("user_events.json", events)
+    write_csv("products.csv", products)
+    write_records("categories.csv", CATEGORIES)
+
+    # The remaining generators only depend on users/products/sessions, so they
+    # run side by side in worker processes.  Each job has its own seed and all
+    # files are still written here, in a fixed order.
+    with ProcessPoolExecutor(max_workers=GEN_WORKERS) as executor:
+        catalog_job = executor.submit(run_seeded, 43, gen_product_catalog, products)
+
+        print("[4/9] Sessions (cross-device login)")
+        sessions, session_refs = gen_sessions(users)
+        write_records("sessions.csv", sessions)
+
+        carts_job = executor.submit(run_seeded, 44, gen_carts, users, products, session_refs)
+        orders_job = executor.submit(run_seeded, 45, gen_orders, users, products, addresses)
+        events_job = executor.submit(
+            run_seeded, 46, gen_user_events, users, products, session_refs, OUTPUT_DIR / "user_events.ndjson",
+        )
+
+        print("[5/9] Product Catalog (MongoDB)")
+        write_json("product_catalog.json", catalog_job.result())
+
+        print("[6/9] Carts")
+        carts, cart_items = carts_job.result()
+        write_records("carts.csv", carts)
+        write_records("cart_items.csv", cart_items)
+
+        print("[7/9] Orders, Order Items, Payments")
+        orders, order_items, payments = orders_job.result()
+        write_csv("orders.csv", orders)
+        write_csv("order_items.csv", order_items)
+        write_csv("payments.csv", payments)
+
+        print("[8/9] Returns")
+        returns_list, return_items = gen_returns(orders, order_items)
+        if returns_list:
+            write_records("returns.csv", returns_list)
+        if return_items:
+            write_records("return_items.csv", return_items)
+
+        print("[9/9] User Events (MongoDB)")
+        n_events = events_job.result()
+        report_written("user_events.ndjson", n_events, "docs")
 
     print("\n[Neo4j] Generating Cypher import...")
-    cypher = gen_neo4j_import(users, products, orders, order_items_all)
     cypher_path = OUTPUT_DIR / "neo4j_import.cypher"
-    with open(cypher_path, "w") as f:
-        f.write(cypher)
+    gen_neo4j_import(users, products, orders, order_items, cypher_path)
     print(f"  wrote → {cypher_path.name}")
 
     print("\n✓ Data generation complete!")
     print(f"  Output directory: {OUTPUT_DIR.resolve()}")
-    print(f"  Users:        {len(users):>10,}")
-    print(f"  Products:     {len(products):>10,}")
-    print(f"  Orders:       {len(orders):>10,}")
-    print(f"  Order Items:  {len(order_items_all):>10,}")
+    print(f"  Users:        {num_rows(users):>10,}")
+    print(f"  Products:     {num_rows(products):>10,}")
+    print(f"  Orders:       {num_rows(orders):>10,}")
+    print(f"  Order Items:  {num_rows(order_items):>10,}")
     print(f"  Sessions:     {len(sessions):>10,}")
     print(f"  Carts:        {len(carts):>10,}")
     print(f"  Cart Items:   {len(cart_items):>10,}")
     print(f"  Returns:      {len(returns_list):>10,}")
-    print(f"  User Events:  {len(events):>10,}")
+    print(f"  User Events:  {n_events:>10,}")
 
 
 if __name__ == "__main__":
@@ -32,7 +32,7 @@ if [ ! -f "$DATA_DIR/users.csv" ]; then
         python3 -m venv .venv
     fi
     source .venv/bin/activate
-    pip install faker --quiet
+    pip install faker numpy orjson --quiet
     python3 scripts/generate_data.py
     deactivate
 else
@@ -145,7 +145,7 @@ echo "  MySQL import complete."
 echo ""
 echo "[Step 5/7] Importing data into MongoDB..."
 docker cp "$DATA_DIR/product_catalog.json" ecommerce_mongo:/tmp/product_catalog.json
-docker cp "$DATA_DIR/user_events.json" ecommerce_mongo:/tmp/user_events.json
+docker cp "$DATA_DIR/user_events.ndjson" ecommerce_mongo:/tmp/user_events.ndjson
 
 docker exec ecommerce_mongo mongoimport \
     --db ecommerce --collection product_catalog \
@@ -153,7 +153,7 @@ docker exec ecommerce_mongo mongoimport \
 
 docker exec ecommerce_mongo mongoimport \
     --db ecommerce --collection user_events \
-    --file /tmp/user_events.json --jsonArray --drop 2>/dev/null
+    --file /tmp/user_events.ndjson --drop 2>/dev/null
 
 docker exec ecommerce_mongo mongosh ecommerce --quiet --eval '
     db.product_catalog.createIndex({ product_id: 1 }, { unique: true });
@@ -161,7 +161,8 @@ docker exec ecommerce_mongo mongosh ecommerce --quiet --eval '
     db.product_catalog.createIndex({ "variants.color": 1 });
     db.product_catalog.createIndex({ "variants.size": 1 });
     db.user_events.createIndex({ user_id: 1, timestamp: -1 });
-    db.user_events.createIndex({ event_type: 1 });
+    db.user_events.createIndex({ user_id: 1, event_type: 1, timestamp: -1 });
+    db.user_events.createIndex({ event_type: 1, "data.product_id": 1 });
     db.user_events.createIndex({ "data.product_id": 1 });
 ' 2>/dev/null
 echo "  MongoDB import and indexing complete."
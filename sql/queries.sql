@@ -98,7 +98,7 @@ WHERE  prev_order_date IS NOT NULL;
 
 -- Q11
 SELECT ROUND(
-    100.0 * SUM(CASE WHEN converted_to_order = FALSE THEN 1 ELSE 0 END)
+    100.0 * SUM(NOT converted_to_order)
           / NULLIF(COUNT(*), 0),
     2
 ) AS cart_abandonment_pct
@@ -109,8 +109,8 @@ WHERE created_at >= NOW() - INTERVAL 30 DAY;
 SELECT u.user_id,
        u.username,
        COUNT(o.order_id)                              AS total_orders,
-       DATEDIFF(NOW(), MAX(o.order_date))             AS days_since_last_purchase
+       MAX(o.order_date)                              AS last_order
 FROM   users u
 LEFT   JOIN orders o ON u.user_id = o.user_id AND o.status != 'cancelled'
 GROUP  BY u.user_id, u.username
-ORDER  BY days_since_last_purchase IS NULL, days_since_last_purchase ASC;
+ORDER  BY last_order IS NULL, last_order DESC;
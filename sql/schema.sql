@@ -98,6 +98,7 @@ CREATE TABLE carts (
 
 CREATE INDEX idx_carts_user   ON carts(user_id);
 CREATE INDEX idx_carts_active ON carts(is_active, converted_to_order);
+CREATE INDEX idx_carts_created_converted ON carts(created_at, converted_to_order);
 
 CREATE TABLE cart_items (
     cart_item_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -128,7 +129,9 @@ CREATE TABLE orders (
     FOREIGN KEY (shipping_address_id) REFERENCES addresses(address_id)
 ) ENGINE=InnoDB;
 
-CREATE INDEX idx_orders_user   ON orders(user_id);
+-- (user_id, status, order_date) covers the per-user filters in Q8, Q10 and Q13
+-- and still serves the user_id foreign key as its leftmost prefix.
+CREATE INDEX idx_orders_user_status_date ON orders(user_id, status, order_date);
 CREATE INDEX idx_orders_date   ON orders(order_date);
 CREATE INDEX idx_orders_status ON orders(status);
 